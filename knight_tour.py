@@ -3,17 +3,28 @@
 
 """
 This script solves the knight's shortest path problem on a chessboard.
-It uses Breadth-First Search (BFS) to find the shortest path from a start to an end position.
+All shortest paths between every pair of squares are found once with Breadth-First Search (BFS),
+reduced by the board's symmetries and cached in ~/.cache/knight_tour/canonical_pairs.pkl, so that
+later runs answer a start/end query with a table lookup.
 """
 
 import argparse
 import json
 import logging
-from collections import deque
+import os
+import pickle
+import tempfile
+from functools import lru_cache
+import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.colors as mcolors
 import graphviz
 
+# Location of the persistent all-pairs shortest path cache, and the version of its format
+# (bump CACHE_VERSION whenever the stored paths change so that old caches get rebuilt)
+CACHE_FILE = os.path.expanduser(os.path.join("~", ".cache", "knight_tour", "canonical_pairs.pkl"))
+CACHE_VERSION = 1
+
 # Logging Setup (show info messages, including timestamp, log level, and message)
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
@@ -24,6 +35,7 @@ def is_valid(x_coord, y_coord):
     """
     return 0 <= x_coord < 8 and 0 <= y_coord < 8
 
+@lru_cache(maxsize=None)
 def to_algebraic(x_coord, y_coord):
     """
     Convert grid coordinates (x_coord, y_coord) into chessboard algebraic notation.
@@ -31,82 +43,260 @@ def to_algebraic(x_coord, y_coord):
     """
     return f"{chr(y_coord + ord('a'))}{x_coord + 1}"
 
+@lru_cache(maxsize=128)
 def from_algebraic(pos):
     """
     Convert a position in algebraic notation (like 'a1') into grid coordinates (x_coord, y_coord).
     Example: 'a1' -> (0, 0)
+    Raises ValueError if the position is not on the chessboard.
     """
-    return int(pos[1]) - 1, ord(pos[0]) - ord('a')
+    x_coord, y_coord = int(pos[1]) - 1, ord(pos[0]) - ord('a')
+    if not is_valid(x_coord, y_coord):
+        raise ValueError(f"Position {pos!r} is not on the chessboard.")
+    return x_coord, y_coord
 
-# KnightPathFinder Class
-class KnightPathFinder:
+def to_idx(x_coord, y_coord):
+    """
+    Convert grid coordinates (x_coord, y_coord) into a square index in the range 0..63.
+    Example: (1, 2) -> 10
+    """
+    return x_coord * 8 + y_coord
+
+def from_idx(idx):
+    """
+    Convert a square index in the range 0..63 back into grid coordinates (x_coord, y_coord).
+    Example: 10 -> (1, 2)
     """
-    Class that implements the knight's pathfinding algorithm using BFS.
+    return divmod(idx, 8)
+
+# Board Precomputation
+# The knight moves in 8 possible directions
+KNIGHT_MOVES = ((2, 1), (1, 2), (-1, 2), (-2, 1),
+                (-2, -1), (-1, -2), (1, -2), (2, -1))
+
+# Valid knight moves from every square index, computed once since the board is fixed at 8x8
+NEIGHBORS = [
+    tuple(to_idx(x_coord + delta_x, y_coord + delta_y)
+          for delta_x, delta_y in KNIGHT_MOVES
+          if is_valid(x_coord + delta_x, y_coord + delta_y))
+    for x_coord, y_coord in map(from_idx, range(64))
+]
+
+# The same adjacency as NumPy arrays for the compiled BFS (rows padded with -1)
+NEIGHBORS_NP = np.full((64, 8), -1, dtype=np.int8)
+NEIGHBOR_CNT = np.zeros(64, dtype=np.int8)
+for _idx, _moves in enumerate(NEIGHBORS):
+    NEIGHBORS_NP[_idx, :len(_moves)] = _moves
+    NEIGHBOR_CNT[_idx] = len(_moves)
+
+@lru_cache(maxsize=None)
+def _compiled_all_pairs_bfs():
     """
-    def __init__(self):
+    Build the Numba-compiled all-pairs BFS on first use. Numba is only imported here,
+    so runs that find the shortest paths in the on-disk cache never load it.
+    """
+    from numba import njit, prange
+
+    @njit(cache=True)
+    def _bfs_into(src, dist, parents, neighbors, cnt):
         """
-        Initialize the KnightPathFinder object. The knight moves in 8 possible directions.
+        Compiled level-synchronous BFS over the whole board from the src index. Fills dist
+        with the distance to every square (-1 if not reached) and parents with, per square,
+        the predecessors that achieved that distance (rows padded with -1).
         """
-        self.knight_moves = [(2, 1), (1, 2), (-1, 2), (-2, 1),
-                             (-2, -1), (-1, -2), (1, -2), (2, -1)]
+        dist[:] = -1
+        parents[:, :] = -1
+        parent_cnt = np.zeros(64, dtype=np.int8)
+        frontier = np.empty(64, dtype=np.int8)
+        next_frontier = np.empty(64, dtype=np.int8)
+        dist[src] = 0
+        frontier[0] = src
+        fsize = 1
+        while fsize > 0:
+            nsize = 0
+            for i in range(fsize):
+                current = frontier[i]
+                new_dist = dist[current] + 1
+                for j in range(cnt[current]):
+                    new_idx = neighbors[current, j]
+                    if dist[new_idx] < 0:
+                        dist[new_idx] = new_dist
+                        next_frontier[nsize] = new_idx
+                        nsize += 1
+                    elif dist[new_idx] != new_dist:
+                        continue
+                    parents[new_idx, parent_cnt[new_idx]] = current
+                    parent_cnt[new_idx] += 1
+            frontier, next_frontier = next_frontier, frontier
+            fsize = nsize
+
+    @njit(parallel=True, cache=True)
+    def _all_pairs_bfs(neighbors, cnt):
+        """
+        Run the 64 single-source BFSes in parallel, one source square per iteration. Each
+        source writes only its own rows, so no synchronisation is needed between them.
+        Returns the parent DAG rooted at every source.
+        """
+        dist_all = np.empty((64, 64), dtype=np.int8)
+        parents_all = np.empty((64, 64, 8), dtype=np.int8)
+        for src in prange(64):
+            _bfs_into(src, dist_all[src], parents_all[src], neighbors, cnt)
+        return parents_all
+
+    return _all_pairs_bfs
+
+# Graphviz node declaration of every square, emitted as-is into each generated graph
+NODE_DOT = {
+    (x_coord, y_coord): f'    "{x_coord},{y_coord}" [label={to_algebraic(x_coord, y_coord)} shape=circle]'
+    for x_coord in range(8) for y_coord in range(8)
+}
+
+# Chessboard background (light and dark squares) and its colormap for visualize_board
+BOARD_COLORS = np.add.outer(np.arange(8), np.arange(8)) & 1
+BOARD_CMAP = mcolors.ListedColormap(["#f0d9b5", "#b58863"])
+
+# Grid coordinates of every square index, used to convert paths back at the API boundary
+SQUARES = [from_idx(idx) for idx in range(64)]
+
+# The 8 symmetries of the board (rotations and reflections), as functions of (x_coord, y_coord)
+BOARD_SYMMETRIES = (
+    lambda x_coord, y_coord: (x_coord, y_coord),
+    lambda x_coord, y_coord: (7 - x_coord, y_coord),
+    lambda x_coord, y_coord: (x_coord, 7 - y_coord),
+    lambda x_coord, y_coord: (7 - x_coord, 7 - y_coord),
+    lambda x_coord, y_coord: (y_coord, x_coord),
+    lambda x_coord, y_coord: (7 - y_coord, x_coord),
+    lambda x_coord, y_coord: (y_coord, 7 - x_coord),
+    lambda x_coord, y_coord: (7 - y_coord, 7 - x_coord),
+)
+
+# Each symmetry as a permutation of square indices, and the table mapping a transformed
+# square index back to the (x, y) coordinates of the original square
+SYMMETRY_PERMS = [[to_idx(*symmetry(*square)) for square in SQUARES] for symmetry in BOARD_SYMMETRIES]
+SYMMETRY_UNMAPS = [[SQUARES[perm.index(idx)] for idx in range(64)] for perm in SYMMETRY_PERMS]
+
+def _canonical(src, dst):
+    """
+    Return the canonical representative of the (src, dst) pair under the board symmetries
+    (the lexicographically smallest transformed pair) and the index of that symmetry.
+    """
+    return min(((perm[src], perm[dst]), which) for which, perm in enumerate(SYMMETRY_PERMS))
+
+def _walk(parents, node, root):
+    """
+    Yield every shortest path from root to node by backtracking over the parent DAG.
+    A single path list is extended and trimmed while backtracking, and only copied
+    (reversed, from root to node) once root is reached.
+    """
+    path = [node]
+
+    def backtrack(current):
+        if current == root:
+            yield path[::-1]
+            return
+        for parent in parents[current]:
+            if parent == -1:
+                break
+            path.append(parent)
+            yield from backtrack(parent)
+            path.pop()
+
+    yield from backtrack(node)
+
+def _compute_all_paths():
+    """
+    Compute every shortest path between every canonical pair of squares by walking the
+    parent DAG of each source square. Paths are stored as bytes of square indices, keyed
+    by (src, dst); other pairs are recovered by symmetry.
+    """
+    all_paths = {}
+    parents_all = _compiled_all_pairs_bfs()(NEIGHBORS_NP, NEIGHBOR_CNT)
+    for src, parents in enumerate(parents_all.tolist()):
+        for dst in range(64):
+            if _canonical(src, dst)[0] == (src, dst):
+                all_paths[(src, dst)] = [bytes(path) for path in _walk(parents, dst, src)]
+    return all_paths
+
+@lru_cache(maxsize=None)
+def _load_all_paths(cache_file=CACHE_FILE):
+    """
+    Load the all-pairs shortest paths from the on-disk cache, computing and saving them
+    on the first query (or when the cache is unreadable or from another CACHE_VERSION).
+    """
+    try:
+        with open(cache_file, "rb") as cache:
+            version, all_paths = pickle.load(cache)
+        if version == CACHE_VERSION:
+            return all_paths
+    except (OSError, pickle.UnpicklingError, EOFError, ValueError, TypeError, AttributeError,
+            ImportError):
+        pass  # Missing, damaged or old-format cache files are simply rebuilt
+
+    all_paths = _compute_all_paths()
+    try:
+        # Write to a temporary file next to the cache and swap it in, so concurrent runs
+        # never see a partially written cache
+        cache_dir = os.path.dirname(cache_file)
+        os.makedirs(cache_dir, exist_ok=True)
+        descriptor, temp_file = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "wb") as cache:
+                pickle.dump((CACHE_VERSION, all_paths), cache, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_file, cache_file)
+        finally:
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+    except OSError as error:
+        logging.warning("Could not save shortest path cache: %s", error)
+    return all_paths
+
+# KnightPathFinder Class
+class KnightPathFinder:
+    """
+    Class that finds and visualizes knight's shortest paths. Paths are looked up in the
+    cached, symmetry-reduced all-pairs table; BFS only runs when that cache is rebuilt.
+    """
+    _fig = None  # Figure shared by all instances in visualize_board, created on first use
+    _ax = None
 
     def find_shortest_paths(self, start, end):
         """
-        Optimized BFS to find all shortest paths from start to end for a knight's tour.
+        Find all shortest paths from start to end for a knight's tour.
+        The paths are looked up in the precomputed table of canonical pairs and converted
+        from square indices back to (x, y) coordinates through the matching symmetry.
+        Raises ValueError if start or end is not on the chessboard.
         """
-        from collections import defaultdict
-
-        queue = deque([(start, [start])])  # Store tuples of (current position, path)
-        shortest_paths = []
-        visited = defaultdict(lambda: float('inf'))  # Tracks shortest path length to each node
-        min_length = float('inf')  # To track the minimum length of paths found
-
-        while queue:
-            current, path = queue.popleft()
-            
-            # Stop exploring if the path is longer than the shortest already found
-            if len(path) > min_length:
-                continue
-
-            # If we reach the destination
-            if current == end:
-                if len(path) < min_length:
-                    shortest_paths = [path]  # Reset with new shortest path
-                    min_length = len(path)
-                elif len(path) == min_length:
-                    shortest_paths.append(path)
-                continue
-
-            # Explore neighbors
-            for delta_x, delta_y in self.knight_moves:
-                new_pos = (current[0] + delta_x, current[1] + delta_y)
-                if is_valid(new_pos[0], new_pos[1]):
-                    # Only consider the move if it leads to a shorter path
-                    if len(path) + 1 <= visited[new_pos]:
-                        visited[new_pos] = len(path) + 1
-                        queue.append((new_pos, path + [new_pos]))
-
-        return shortest_paths
+        if not is_valid(*start) or not is_valid(*end):
+            raise ValueError(f"Positions {start} and {end} must both be on the chessboard.")
+        src, dst = to_idx(*start), to_idx(*end)
+
+        # Trivial cases: no move needed, or end is a single knight move away
+        if src == dst:
+            return [[SQUARES[src]]]
+        if dst in NEIGHBORS[src]:
+            return [[SQUARES[src], SQUARES[dst]]]
+
+        # Look up the symmetric canonical pair and map its paths back onto this one
+        key, which = _canonical(src, dst)
+        unmap = SYMMETRY_UNMAPS[which]
+        return [[unmap[idx] for idx in path] for path in _load_all_paths()[key]]
 
     def generate_graph(self, paths, filename="knight_paths"):
         """
         Generate a single Graphviz DOT file representing multiple knight paths.
         All paths will be shown in the same graph, and only one file will be saved.
         """
-        dot = graphviz.Digraph("KnightPaths_Combined")
-        
-        # Create nodes for each position on the chessboard
-        for i in range(8):
-            for j in range(8):
-                dot.node(f"{i},{j}", label=to_algebraic(i, j), shape="circle")
-        
-        # Add edges for each path to the same graph
-        for path in paths:
-            for i in range(len(path) - 1):
-                start, end = path[i], path[i + 1]
-                dot.edge(f"{start[0]},{start[1]}", f"{end[0]},{end[1]}")
-        
-        # Render and save the graph with a single filename (no cleanup flag here)
+        # Declare only the squares visited by at least one path
+        nodes = "\n".join(NODE_DOT[square] for square in
+                          dict.fromkeys(square for path in paths for square in path))
+
+        # Add edges for each path to the same graph, drawing segments shared by paths once
+        segments = dict.fromkeys((start, end) for path in paths for start, end in zip(path, path[1:]))
+        edges = "\n".join(f'    "{start[0]},{start[1]}" -> "{end[0]},{end[1]}"'
+                          for start, end in segments)
+
+        # Render and save the graph with a single filename, reusing the fixed node declarations
+        dot = graphviz.Source(f"digraph KnightPaths_Combined {{\n{nodes}\n{edges}\n}}\n")
         dot.render(filename, format="png", cleanup=True)
         logging.info("Combined graph saved as %s.png", filename)
 
@@ -114,55 +304,52 @@ class KnightPathFinder:
         """
         Visualize the knight's paths and arrows on the chessboard.
         """
-        board = [[-1 for _ in range(8)] for _ in range(8)]
-        for step, (x_coord, y_coord) in enumerate(path):
-            board[x_coord][y_coord] = step
-        self.visualize_board(board)
+        self.visualize_board([path])
 
     def visualize_board(self, paths):
         """
         Visualize the chessboard with all paths.
         """
-        board = [[-1 for _ in range(8)] for _ in range(8)]  # Start with an empty board
+        board = np.full((8, 8), -1, dtype=np.int16)  # Start with an empty board
         for path_index, path in enumerate(paths):
             for step, (x_coord, y_coord) in enumerate(path):
-                board[x_coord][y_coord] = step + (path_index * 100)  # Differentiate steps across paths
+                board[x_coord, y_coord] = step + (path_index * 100)  # Differentiate steps across paths
+
+        # Reuse the plot across calls, creating it again only if its window was closed
+        # (stored on the class, so every KnightPathFinder shares the same figure)
+        cls = type(self)
+        if cls._fig is None or not plt.fignum_exists(cls._fig.number):
+            cls._fig, cls._ax = plt.subplots(figsize=(8, 8))
+        else:
+            cls._ax.cla()  # Clear the previous paths to avoid overlap
+        axis = cls._ax
 
-        # Create a plot
-        plt.clf()  # Clear any previous figure to avoid overlap
-        _, axis = plt.subplots(figsize=(8, 8))
-        
         # Set board colors (light and dark squares)
-        colors = [[(i + j) % 2 for j in range(8)] for i in range(8)]
-        cmap = mcolors.ListedColormap(["#f0d9b5", "#b58863"])
-        axis.imshow(colors, cmap=cmap, origin="upper")
+        axis.imshow(BOARD_COLORS, cmap=BOARD_CMAP, origin="upper")
 
         # Overlay the moves from each path
-        for x_coord in range(8):
-            for y_coord in range(8):
-                move = board[x_coord][y_coord]
-                if move != -1:
-                    # We use the `move` value to color the step and display it differently for each path
-                    axis.text(y_coord, x_coord, str(move % 100), color="black", ha="center", va="center", 
-                            fontsize=12, fontweight="bold")
-                    
-        # Add arrows for paths
-        for path_index, path in enumerate(paths):
-            for step in range(len(path) - 1):
-                start = path[step]
-                end = path[step + 1]
-                axis.annotate("",
-                            xy=(end[1] + 0.5, end[0] + 0.5),  # End point (x, y)
-                            xytext=(start[1] + 0.5, start[0] + 0.5),  # Start point (x, y)
-                            arrowprops=dict(facecolor="black", arrowstyle="->", lw=0.5),
-                            fontsize=8)
+        x_coords, y_coords = np.nonzero(board != -1)
+        for x_coord, y_coord, move in zip(x_coords, y_coords, board[x_coords, y_coords]):
+            # We use the `move` value to color the step and display it differently for each path
+            axis.text(y_coord, x_coord, str(move % 100), color="black", ha="center", va="center",
+                      fontsize=12, fontweight="bold")
+
+        # Add arrows for paths, drawing every segment in a single quiver call
+        segments = [(start, end) for path in paths for start, end in zip(path, path[1:])]
+        if segments:
+            starts, ends = np.array(segments, dtype=float).transpose(1, 0, 2)
+            delta = ends - starts
+            axis.quiver(starts[:, 1] + 0.5, starts[:, 0] + 0.5,  # Start points (x, y)
+                        delta[:, 1], delta[:, 0],  # Offsets to the end points (x, y)
+                        angles="xy", scale_units="xy", scale=1, color="black",
+                        width=0.0012, headwidth=8, headlength=12, headaxislength=11)
 
         axis.set_xticks([x_coord + 0.5 for x_coord in range(8)])
         axis.set_yticks([y_coord + 0.5 for y_coord in range(8)])
         axis.set_xticklabels(['a', 'b', 'c', 'd', 'e', 'f', 'g', 'h'])
         axis.set_yticklabels(['8', '7', '6', '5', '4', '3', '2', '1'])
         axis.grid(False)
-        plt.title("Knight's Path", fontsize=16, fontweight="bold")
+        axis.set_title("Knight's Path", fontsize=16, fontweight="bold")
         plt.show()
 
 def main():